@@ -22,12 +22,23 @@ class ApiResult:
 
 
 class OrderRequest:
-    def __init__(self):
-        self.instrument_name = ""
-        self.quantity = 0.0
-        self.price = 0.0
-        self.side = OrderSide.unknown
-        self.type = OrderType.unknown
+    __slots__ = (
+        'instrument_name',
+        'quantity',
+        'price',
+        'side',
+        'type',
+        'order_id',
+        'timestamp',
+    )
+
+    def __init__(self, instrument_name="", side=OrderSide.unknown, type=OrderType.unknown,
+                 price=0.0, quantity=0.0):
+        self.instrument_name = instrument_name
+        self.quantity = quantity
+        self.price = price
+        self.side = side
+        self.type = type
         self.order_id = ""
         self.timestamp = datetime.datetime.now().timestamp()
 
@@ -66,6 +77,16 @@ class Fill:
 
 
 class TopOfBook:
+    __slots__ = (
+        'exchange',
+        'product',
+        'best_bid_price',
+        'best_bid_qty',
+        'best_ask_price',
+        'best_ask_qty',
+        'timestamp',
+    )
+
     def __init__(self):
         self.exchange = ""
         self.product = ""
@@ -3,6 +3,8 @@ import decimal
 import traceback
 from enum import Enum
 
+from numba import njit
+
 from market_maker.strategy.strategy_interface import StrategyInterface
 from market_maker.orders_manager import OrdersManager
 
@@ -21,6 +23,19 @@ from market_maker.definitions import (
 )
 
 
+# compiled eagerly at import so the first quote doesn't pay the JIT cost
+@njit('UniTuple(int64, 2)(float64, float64, float64, int64)', cache=True)
+def mid_based_best_ticks(best_ask, best_bid, tick_size, price_rounding):
+    mid_price = (best_ask + best_bid) / 2.0
+    mid_ticks = round(mid_price / tick_size)
+
+    if best_ask - best_bid == 2.0 * tick_size:
+        return mid_ticks + 1, mid_ticks - 1
+    elif round(mid_ticks * tick_size, price_rounding) >= mid_price:
+        return mid_ticks, mid_ticks - 1
+    return mid_ticks + 1, mid_ticks
+
+
 class ActionType(Enum):
     Nothing = 1
     IgnoreReconnection = 2
@@ -30,6 +45,42 @@ class MarketMaker(StrategyInterface):
     TIME_TO_WAIT_SINCE_START_SECS = 10
     MAX_NUMBER_OF_ATTEMPTS_SECS = 10
 
+    __slots__ = (
+        'logger',
+        'config',
+        'exchange_adapter',
+        'orders_manager',
+        'instrument_name',
+        'mid_price_based_calculation',
+        'tick_size',
+        'stop_strategy_on_error',
+        'positional_retreat',
+        'send_post_only_orders',
+        'process_orders_on_start',
+        'update_orders_flag',
+        'started_time',
+        'last_amend_time',
+        'reconnecting',
+        'tob',
+        'active',
+        'current_position',
+        'num_of_sent_orders',
+        'price_rounding',
+        'cancel_all_request_was_sent',
+        'positional_retreat_increment',
+        'positional_retreat_ticks',
+        'user_asks',
+        'user_bids',
+        'white_list',
+        '_now',
+        '_warmed_up',
+        '_tob_key',
+        '_update_order_state',
+        '_ask_templates',
+        '_bid_templates',
+        '_dispatch',
+    )
+
     def __init__(self, cfg, exchange_adapter):
         self.logger = logging.getLogger()
 
@@ -40,17 +91,22 @@ class MarketMaker(StrategyInterface):
         self.exchange_adapter.set_order_update_callback(self.on_market_update)
         self.exchange_adapter.update_post_only_flag(self.send_post_only_orders)
         self.orders_manager = OrdersManager(self.exchange_adapter)
+        self._update_order_state = self.orders_manager.update_order_state
 
         self.process_orders_on_start = False
         self.exchange_adapter.cancel_orders_on_start = True
 
         self.update_orders_flag = False
 
-        self.started_time = time.time()
+        self._now = time.monotonic
+        self.started_time = self._now()
+        self._warmed_up = False
         self.last_amend_time = None
         self.reconnecting = False
 
         self.tob = None
+        # (best bid, best ask) of the accepted top of book
+        self._tob_key = None
         self.active = True
         self.current_position = None
         self.num_of_sent_orders = 0
@@ -63,25 +119,47 @@ class MarketMaker(StrategyInterface):
         self.user_asks = self.config.orders.asks
         self.user_bids = self.config.orders.bids
 
+        # per-level (price offset, quantity) pairs, only the top of book changes per tick.
+        # Fresh OrderRequest objects are still built on every call since the orders manager
+        # keeps references to the sent orders and perform_retreats mutates prices in place.
+        tick_size = float(self.tick_size)
+        self._ask_templates = [(tick_size * level, qty) for level, qty in self.user_asks]
+        self._bid_templates = [(tick_size * level, qty) for level, qty in self.user_bids]
+
+        # updates not listed here are treated as order state events
+        self._dispatch = {
+            TopOfBook: self._on_tob,
+            ExchangeOrders: self.process_active_orders_on_start,
+            Position: self._on_position,
+            AmendRejection: self._on_rejection,
+            NewOrderRejection: self._on_rejection,
+            OrderEliminationAcknowledgement: self._on_elimination,
+        }
+
         self.white_list = {
             "post-only order would cross as non-maker": ActionType.IgnoreReconnection,
         }
 
     def _load_configuration(self, cfg):
-        option_names = (
-            'instrument_name',
-            'mid_price_based_calculation',
-            'tick_size',
-            'stop_strategy_on_error',
-            'positional_retreat',
-            'send_post_only_orders'
+        self.instrument_name = cfg.instrument_name
+        self.mid_price_based_calculation = cfg.mid_price_based_calculation
+        self.tick_size = cfg.tick_size
+        self.stop_strategy_on_error = cfg.stop_strategy_on_error
+        self.positional_retreat = cfg.positional_retreat
+        self.send_post_only_orders = cfg.send_post_only_orders
+
+        options = (
+            ('instrument_name', self.instrument_name),
+            ('mid_price_based_calculation', self.mid_price_based_calculation),
+            ('tick_size', self.tick_size),
+            ('stop_strategy_on_error', self.stop_strategy_on_error),
+            ('positional_retreat', self.positional_retreat),
+            ('send_post_only_orders', self.send_post_only_orders),
         )
-        for option_name in option_names:
-            option = getattr(cfg, option_name)
+        for option_name, option in options:
             if option is None:
                 self.logger.error(f'{option_name} was not found')
                 raise Exception(f'{option_name} was not found')
-            setattr(self, option_name, option)
 
     @staticmethod
     def get_rounding(tick):
@@ -99,10 +177,9 @@ class MarketMaker(StrategyInterface):
                         err_msg))
                 return
 
-        stack_str = traceback.format_exc()
-        self.logger.error("handle_exception traceback: {}".format(stack_str))
-        for line in traceback.format_stack():
-            self.logger.error(line.strip())
+        if self.logger.isEnabledFor(logging.ERROR):
+            self.logger.error('handle_exception traceback: %s\nstack:\n%s',
+                              traceback.format_exc(), ''.join(traceback.format_stack()))
 
         count = 0
         while count < 5:
@@ -125,7 +202,8 @@ class MarketMaker(StrategyInterface):
         self.reconnecting = True
 
         await self.reset(err_msg)
-        self.started_time = time.time()
+        self.started_time = self._now()
+        self._warmed_up = False
 
         self.reconnecting = False
 
@@ -145,6 +223,8 @@ class MarketMaker(StrategyInterface):
     async def reset(self, reset_reason):
         self.cancel_all_request_was_sent = False
 
+        # cancel-all is sent over the same websocket that reconnect() closes and reopens,
+        # so the two calls must not overlap
         await self._cancel_orders()
         self.cancel_all_request_was_sent = True
         self.last_amend_time = None
@@ -165,40 +245,45 @@ class MarketMaker(StrategyInterface):
     async def process_active_orders_on_start(self, orders_msg):
         if not self.process_orders_on_start:
             return
+        elif not orders_msg.bids and not orders_msg.asks:
+            return
         self.orders_manager.activate_orders(orders_msg)
 
     async def on_market_update(self, update):
         if self.active is False:
             self.logger.info('Strategy is not active, update will be ignored')
             return
-        elif isinstance(update, TopOfBook):
-            if self.tob is None:
-                self.update_orders_flag = True
-                self.tob = update
-            elif self.tob_moved(update):
-                self.update_orders_flag = True
-                self.tob = update
-            return
-        elif isinstance(update, ExchangeOrders):
-            await self.process_active_orders_on_start(update)
-            return
-        elif isinstance(update, Position):
-            self.current_position = update.position
+        handler = self._dispatch.get(type(update), self._on_order_state)
+        await handler(update)
+
+    async def _on_tob(self, update):
+        tob_key = (update.best_bid_price, update.best_ask_price)
+        if tob_key != self._tob_key:
+            self.update_orders_flag = True
+            self.tob = update
+            self._tob_key = tob_key
+
+    async def _on_position(self, update):
+        self.current_position = update.position
+
+    async def _on_rejection(self, update):
+        self.logger.info('Received order rejection %r', update.__dict__)
+        raise Exception(f'Received order rejection {update.__dict__}')
+
+    async def _on_elimination(self, update):
+        if update.order_id in self.orders_manager.ids_to_cancel_on_fill:
             return
-        elif isinstance(update, (AmendRejection, NewOrderRejection)):
-            self.logger.info(f'Received order rejection {update.__dict__}')
-            raise Exception(f'Received order rejection {update.__dict__}')
-        elif isinstance(update, OrderEliminationAcknowledgement):
-            if update.order_id in self.orders_manager.ids_to_cancel_on_fill:
-                return
-            else:
-                self.logger.info(f'Received order elimination {update.__dict__}')
-                raise Exception(f'Received order elimination {update.__dict__}')
+        self.logger.info('Received order elimination %r', update.__dict__)
+        raise Exception(f'Received order elimination {update.__dict__}')
+
+    async def _on_order_state(self, update):
         try:
-            self.orders_manager.update_order_state(update.order_id, update)
+            self._update_order_state(update.order_id, update)
         except Exception as err:
-            self.logger.error(f'update_order_state failed on {update}')
-            raise Exception(f'on_market_update raised. update = {type(update)}, reason = {err}')
+            self.logger.error('update_order_state failed on %r', update)
+            raise Exception(
+                f'on_market_update raised. update = {type(update).__name__}, reason = {err}'
+            ) from err
 
     async def run(self):
         if self.active is False:
@@ -208,64 +293,49 @@ class MarketMaker(StrategyInterface):
             return
         elif self.update_orders_flag is False:
             return
-        elif self.started_time + self.TIME_TO_WAIT_SINCE_START_SECS > time.time():
-            return
+        elif self._warmed_up is False:
+            if self.started_time + self.TIME_TO_WAIT_SINCE_START_SECS > self._now():
+                return
+            self._warmed_up = True
 
         self.update_orders_flag = False
         await self.react_to_market_move()
 
-    def tob_moved(self, tob):
-        if self.tob.best_bid_price != tob.best_bid_price or \
-                self.tob.best_ask_price != tob.best_ask_price:
+    def _orders_are_ready_for_amend(self):
+        if not self.last_amend_time:
+            return True
+        orders_manager = self.orders_manager
+        if not orders_manager.live_orders_ids:
             return True
-        return False
 
-    def _orders_are_ready_for_amend(self):
-        known_statuses = self.orders_manager.get_number_of_ready_for_amend()
-        if self.last_amend_time and len(self.orders_manager.live_orders_ids) > 0 and \
-                known_statuses != self.num_of_sent_orders:
+        known_statuses = orders_manager.get_number_of_ready_for_amend()
+        if known_statuses != self.num_of_sent_orders:
             return known_statuses
         return True
 
     def generate_orders(self):
-        best_ask, best_bid = self.tob.best_ask_price, self.tob.best_bid_price
+        tob = self.tob
+        best_ask, best_bid = tob.best_ask_price, tob.best_bid_price
+        price_rounding = self.price_rounding
+
         if self.mid_price_based_calculation:
-            mid_price = (self.tob.best_ask_price + self.tob.best_bid_price) / 2.0
-            rounded_mid = round(round(mid_price / self.tick_size) * self.tick_size,
-                                self.price_rounding)
-
-            if best_ask - best_bid == 2.0 * self.tick_size:
-                best_ask = round(rounded_mid + self.tick_size, self.price_rounding)
-                best_bid = round(rounded_mid - self.tick_size, self.price_rounding)
-            elif rounded_mid >= mid_price:
-                best_ask = rounded_mid
-                best_bid = round(best_ask - self.tick_size, self.price_rounding)
-            else:
-                best_bid = rounded_mid
-                best_ask = round(best_bid + self.tick_size, self.price_rounding)
+            tick_size = float(self.tick_size)
+            ask_ticks, bid_ticks = mid_based_best_ticks(best_ask, best_bid,
+                                                        tick_size, price_rounding)
+            best_ask, best_bid = ask_ticks * tick_size, bid_ticks * tick_size
+
+        instrument_name = self.instrument_name
 
         orders = []
-        for quote in self.user_asks:
-            level, qty = quote
-            order = OrderRequest()
-            order.instrument_name = self.config.instrument_name
-            order.side = OrderSide.sell
-            order.type = OrderType.limit
-
-            order.price = round(best_ask + self.tick_size * level, self.price_rounding)
-            order.quantity = qty
-            orders.append(order)
-
-        for quote in self.user_bids:
-            level, qty = quote
-            order = OrderRequest()
-            order.instrument_name = self.config.instrument_name
-            order.side = OrderSide.buy
-            order.type = OrderType.limit
-
-            order.price = round(best_bid - self.tick_size * level, self.price_rounding)
-            order.quantity = qty
-            orders.append(order)
+        for offset, qty in self._ask_templates:
+            price = round(best_ask + offset, price_rounding)
+            orders.append(
+                OrderRequest(instrument_name, OrderSide.sell, OrderType.limit, price, qty))
+
+        for offset, qty in self._bid_templates:
+            price = round(best_bid - offset, price_rounding)
+            orders.append(
+                OrderRequest(instrument_name, OrderSide.buy, OrderType.limit, price, qty))
         return orders
 
     def perform_retreats(self, orders):
@@ -307,7 +377,7 @@ class MarketMaker(StrategyInterface):
             self.logger.info('_orders_are_ready_for_amend returned False')
 
             known_statuses = res
-            if self.last_amend_time + self.MAX_NUMBER_OF_ATTEMPTS_SECS < time.time():
+            if self.last_amend_time + self.MAX_NUMBER_OF_ATTEMPTS_SECS < self._now():
                 err_msg = (
                     f'Will be reconnected since only {known_statuses} '
                     f'active orders were updated within {self.MAX_NUMBER_OF_ATTEMPTS_SECS} seconds'
@@ -336,5 +406,5 @@ class MarketMaker(StrategyInterface):
                 raise Exception(f'Orders amend failed {err}')
             return
 
-        self.last_amend_time = time.time()
+        self.last_amend_time = self._now()
         self.num_of_sent_orders = len(orders)
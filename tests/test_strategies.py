@@ -1,7 +1,7 @@
 import pytest
 from munch import DefaultMunch
 
-from market_maker.strategy.market_maker import MarketMaker
+from market_maker.strategy.market_maker import MarketMaker, mid_based_best_ticks
 from market_maker.gateways import gateway_interface
 
 from market_maker.definitions import (
@@ -235,6 +235,102 @@ async def test_maker_rounding_mid_based_3(cfg_strategy_fixture):
     assert orders[1].price == 99
 
 
+@pytest.mark.asyncio
+async def test_maker_prices_are_floats(cfg_strategy_fixture):
+    cfg_strategy_fixture.mid_price_based_calculation = True
+
+    try:
+        strategy = MarketMaker(cfg_strategy_fixture, BittestAdapter())
+    except Exception:
+        assert False
+
+    _tob = TopOfBook()
+    _tob.best_bid_price = 99.0
+    _tob.best_ask_price = 101.0
+
+    strategy.tob = _tob
+
+    orders = strategy.generate_orders()
+
+    assert all(isinstance(order.price, float) for order in orders)
+
+
+@pytest.mark.asyncio
+async def test_maker_tob_based_off_tick_grid(cfg_strategy_fixture):
+    cfg_strategy_fixture.tick_size = 0.5
+    cfg_strategy_fixture.orders.asks = [[0, 1], [1, 1]]
+    cfg_strategy_fixture.orders.bids = [[0, 1], [1, 1]]
+
+    try:
+        strategy = MarketMaker(cfg_strategy_fixture, BittestAdapter())
+    except Exception:
+        assert False
+
+    _tob = TopOfBook()
+    _tob.best_bid_price = 99.2
+    _tob.best_ask_price = 100.3
+
+    strategy.tob = _tob
+
+    orders = strategy.generate_orders()
+
+    # offsets are applied to the raw book prices, which are not snapped to the tick grid
+    assert [order.price for order in orders] == [100.3, 100.8, 99.2, 98.7]
+
+
+@pytest.mark.parametrize("best_ask, best_bid, tick_size, price_rounding, expected", [
+    (101.0, 100.5, 1.0, 0, (101, 100)),
+    (101.0, 99.0, 1.0, 0, (101, 99)),
+    (105.0, 95.0, 1.0, 0, (100, 99)),
+    (100.3, 100.0, 0.1, 1, (1002, 1001)),
+    (100.4, 100.0, 0.1, 1, (1002, 1001)),
+])
+def test_mid_based_best_ticks(best_ask, best_bid, tick_size, price_rounding, expected):
+    assert mid_based_best_ticks(best_ask, best_bid, tick_size, price_rounding) == expected
+
+
+@pytest.mark.asyncio
+async def test_maker_tob_update(cfg_strategy_fixture):
+    try:
+        strategy = MarketMaker(cfg_strategy_fixture, BittestAdapter())
+    except Exception:
+        assert False
+
+    _tob = TopOfBook()
+    _tob.exchange = "test_exchange"
+    _tob.product = "test-perp"
+    _tob.best_bid_price = 99.0
+    _tob.best_bid_qty = 1
+    _tob.best_ask_price = 101.0
+    _tob.best_ask_qty = 1
+    _tob.timestamp = 0.0
+
+    await strategy.on_market_update(_tob)
+
+    assert strategy.tob is _tob
+    assert strategy.update_orders_flag
+
+    strategy.update_orders_flag = False
+
+    _same_tob = TopOfBook()
+    _same_tob.best_bid_price = 99.0
+    _same_tob.best_ask_price = 101.0
+
+    await strategy.on_market_update(_same_tob)
+
+    assert strategy.tob is _tob
+    assert not strategy.update_orders_flag
+
+    _moved_tob = TopOfBook()
+    _moved_tob.best_bid_price = 100.0
+    _moved_tob.best_ask_price = 101.0
+
+    await strategy.on_market_update(_moved_tob)
+
+    assert strategy.tob is _moved_tob
+    assert strategy.update_orders_flag
+
+
 @pytest.mark.asyncio
 async def test_maker_positional_retreat(cfg_strategy_fixture):
     try: